@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import heapq
 import math
 
+# Очередь Дайала выгоднее кучи, только если на каждую из C + 1 корзин
+# приходится не меньше стольких пунктов графа; иначе используется куча
+DIAL_MIN_STATES_PER_BUCKET = 8
+
 
 class Problem:
     """Абстрактный класс для формальной задачи."""
@@ -37,21 +42,27 @@ class Problem:
 class Node:
     """Узел в дереве поиска."""
 
+    __slots__ = ("state", "parent", "action", "path_cost")
+
     def __init__(self, state, parent=None, action=None, path_cost=0):
-        self.__dict__.update(
-            state=state, parent=parent, action=action, path_cost=path_cost
-        )
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.path_cost = path_cost
 
     def __repr__(self):
         return f"<{self.state}>"
 
     def __len__(self):
-        return len(self.parent)
+        depth = 0
+        node = self.parent
+        while node is not None:
+            depth += 1
+            node = node.parent
+        return depth
 
     def __lt__(self, other):
-        if self.parent is None:
-            return 0
-        return 1 + (self.path_cost < other.path_cost)
+        return self.path_cost < other.path_cost
 
 
 failure = Node("failure", path_cost=math.inf)  # Алгоритм не смог найти решение
@@ -69,16 +80,22 @@ def expand(problem, node):
 
 def path_actions(node):
     """Возвращает последовательность действий до узла."""
-    if node.parent is None:
-        return []
-    return path_actions(node.parent) + [node.action]
+    actions = []
+    while node.parent is not None:
+        actions.append(node.action)
+        node = node.parent
+    actions.reverse()
+    return actions
 
 
 def path_states(node):
     """Возвращает последовательность состояний до узла."""
-    if node in (cutoff, failure, None):
-        return []
-    return path_states(node.parent) + [node.state]
+    states = []
+    while node not in (cutoff, failure, None):
+        states.append(node.state)
+        node = node.parent
+    states.reverse()
+    return states
 
 
 class ItalyGraphProblem(Problem):
@@ -87,42 +104,180 @@ class ItalyGraphProblem(Problem):
     def __init__(self, graph, initial, goal):
         super().__init__(initial=initial, goal=goal)
         self.graph = graph
+        # Пары (сосед, стоимость) для каждого пункта вычисляются один раз
+        self._adj = {u: tuple(v.items()) for u, v in graph.items()}
+        self._build_csr()
+
+    def _build_csr(self):
+        """Нумерует пункты и строит списки смежности в формате CSR.
+
+        Соседи пункта с номером u — indices[indptr[u]:indptr[u + 1]],
+        стоимости переходов к ним лежат в weights по тем же позициям.
+        """
+        self.id_of = {}
+        for u, neighbors in self._adj.items():
+            self.id_of.setdefault(u, len(self.id_of))
+            for v, _ in neighbors:
+                self.id_of.setdefault(v, len(self.id_of))
+        self.states = list(self.id_of)
+        self.n_states = len(self.states)
+
+        self.indptr = [0]
+        self.indices = []
+        self.weights = []
+        for u in self.states:
+            for v, cost in self._adj.get(u, ()):
+                self.indices.append(self.id_of[v])
+                self.weights.append(cost)
+            self.indptr.append(len(self.indices))
+        self.max_action_cost = max(self.weights, default=0)
+        # Очередь с корзинами подходит только для неотрицательных целых
+        # стоимостей, небольших по сравнению с размером графа
+        int_costs = all(isinstance(c, int) and c >= 0 for c in self.weights)
+        n_buckets = self.max_action_cost + 1
+        self.use_buckets = int_costs and (
+            self.n_states >= DIAL_MIN_STATES_PER_BUCKET * n_buckets
+        )
 
     def actions(self, state):
-        """Возвращает соседей (действия) для данного состояния."""
-        return self.graph.get(state, [])
+        """Возвращает пары (сосед, стоимость) для данного состояния."""
+        return self._adj.get(state, ())
 
     def result(self, state, action):
         """Возвращает результат применения действия (сосед)."""
-        return action
+        return action[0]
 
     def action_cost(self, s, a, s1):
-        """Возвращает стоимость перехода между двумя пунктами."""
-        return self.graph[s][s1]
+        """Возвращает стоимость перехода, хранящуюся в самом действии."""
+        return a[1]
 
     def is_goal(self, state):
         """Проверка, является ли состояние целевым."""
         return state == self.goal
 
 
-def depth_first_search(problem):
-    """Поиск в глубину для нахождения минимального расстояния."""
-    frontier = [Node(problem.initial)]
-    explored = set()
+class _DijkstraSearch:
+    """Поиск Дейкстры по CSR-массивам.
+
+    Подклассы задают очередь с приоритетами через методы pop и push.
+    Устаревшие записи очереди пропускаются при извлечении.
+    """
+
+    def __init__(self, indptr, indices, weights, n_states, source):
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.dist = [math.inf] * n_states
+        self.parent = [-1] * n_states
+        self.dist[source] = 0
+        self.pending = 0
+        self.cur = 0
+        self.push(source, 0)
+
+    def relax(self, u):
+        """Ослабляет рёбра, выходящие из пункта u."""
+        for i in range(self.indptr[u], self.indptr[u + 1]):
+            v = self.indices[i]
+            new_cost = self.cur + self.weights[i]
+            if new_cost < self.dist[v]:
+                self.dist[v] = new_cost
+                self.parent[v] = u
+                self.push(v, new_cost)
+
+
+class _BucketQueueSearch(_DijkstraSearch):
+    """Поиск с очередью с корзинами (алгоритм Дайала).
+
+    Все записи очереди лежат в диапазоне [cur, cur + C], где C — наибольшая
+    стоимость перехода, поэтому достаточно C + 1 корзин, выбираемых по
+    остатку d % (C + 1). Указатель cur только растёт. Годится для
+    небольших неотрицательных целых стоимостей.
+    """
+
+    def __init__(self, indptr, indices, weights, n_states, source):
+        self.size = max(weights, default=0) + 1
+        self.buckets = [[] for _ in range(self.size)]
+        super().__init__(indptr, indices, weights, n_states, source)
+
+    def top(self):
+        """Возвращает наименьшее расстояние среди записей очереди."""
+        while not self.buckets[self.cur % self.size]:
+            self.cur += 1
+        return self.cur
+
+    def pop(self):
+        """Извлекает пункт с наименьшим расстоянием или -1 для устаревшей."""
+        u = self.buckets[self.top() % self.size].pop()
+        self.pending -= 1
+        return u if self.dist[u] == self.cur else -1
+
+    def push(self, v, cost):
+        self.buckets[cost % self.size].append(v)
+        self.pending += 1
+
+
+class _HeapQueueSearch(_DijkstraSearch):
+    """Поиск с двоичной кучей для произвольных стоимостей."""
+
+    def __init__(self, indptr, indices, weights, n_states, source):
+        self.frontier = []
+        super().__init__(indptr, indices, weights, n_states, source)
+
+    def pop(self):
+        """Извлекает пункт с наименьшим расстоянием или -1 для устаревшей."""
+        self.cur, u = heapq.heappop(self.frontier)
+        self.pending -= 1
+        return u if self.dist[u] == self.cur else -1
+
+    def push(self, v, cost):
+        heapq.heappush(self.frontier, (cost, v))
+        self.pending += 1
 
-    while frontier:
-        node = frontier.pop()
 
-        if node.state in explored:
+def depth_first_search(problem):
+    """Поиск минимального расстояния алгоритмом Дейкстры.
+
+    Поиск идёт по целочисленным номерам пунктов и CSR-массивам задачи.
+    Для небольших целых стоимостей очередью служат корзины Дайала,
+    иначе — двоичная куча. Путь восстанавливается по parent при
+    достижении цели.
+    """
+    if problem.is_goal(problem.initial):
+        return [problem.initial], 0
+    if problem.initial not in problem.id_of:
+        return None, math.inf
+    if problem.goal not in problem.id_of:
+        return None, math.inf
+
+    start = problem.id_of[problem.initial]
+    goal = problem.id_of[problem.goal]
+
+    if problem.use_buckets:
+        search = _BucketQueueSearch
+    else:
+        search = _HeapQueueSearch
+    frontier = search(
+        problem.indptr,
+        problem.indices,
+        problem.weights,
+        problem.n_states,
+        start,
+    )
+
+    while frontier.pending:
+        u = frontier.pop()
+        if u == -1:
             continue
 
-        explored.add(node.state)
-
-        if problem.is_goal(node.state):
-            return path_states(node), node.path_cost
+        if u == goal:
+            path = []
+            while u != -1:
+                path.append(problem.states[u])
+                u = frontier.parent[u]
+            path.reverse()
+            return path, frontier.cur
 
-        for child in expand(problem, node):
-            frontier.append(child)
+        frontier.relax(u)
 
     return None, math.inf
 
@@ -172,7 +327,7 @@ if __name__ == "__main__":
     B = input("Введите конечный город: ")
     problem = ItalyGraphProblem(graph, "Милан", "Алессандрия")
 
-    # Поиск в глубину
+    # Поиск кратчайшего пути
     path, cost = depth_first_search(problem)
 
     if path:
@@ -2,7 +2,24 @@
 # -*- coding: utf-8 -*-
 
 import math
+import os
 from itertools import product
+from multiprocessing import Pool
+
+# Меньше этого числа стартовых клеток пул процессов не окупается
+PARALLEL_MIN_STARTS = 10000
+
+# Смещения к восьми соседним клеткам
+DIRS8 = (
+    (-1, -1),
+    (-1, 0),
+    (-1, 1),
+    (0, -1),
+    (0, 1),
+    (1, -1),
+    (1, 0),
+    (1, 1),
+)
 
 
 class Problem:
@@ -35,16 +52,24 @@ class Problem:
 class Node:
     """Узел в дереве поиска."""
 
+    __slots__ = ("state", "parent", "action", "path_cost")
+
     def __init__(self, state, parent=None, action=None, path_cost=0):
-        self.__dict__.update(
-            state=state, parent=parent, action=action, path_cost=path_cost
-        )
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.path_cost = path_cost
 
     def __repr__(self):
         return "<{}>".format(self.state)
 
     def __len__(self):
-        return 0 if self.parent is None else (1 + len(self.parent))
+        depth = 0
+        node = self.parent
+        while node is not None:
+            depth += 1
+            node = node.parent
+        return depth
 
     def __lt__(self, other):
         return self.path_cost < other.path_cost
@@ -65,16 +90,22 @@ def expand(problem, node):
 
 def path_actions(node):
     """Последовательность действий, чтобы добраться до этого узла."""
-    if node.parent is None:
-        return []
-    return path_actions(node.parent) + [node.action]
+    actions = []
+    while node.parent is not None:
+        actions.append(node.action)
+        node = node.parent
+    actions.reverse()
+    return actions
 
 
 def path_states(node):
     """Последовательность состояний, чтобы добраться до этого узла."""
-    if node in (cutoff, failure, None):
-        return []
-    return path_states(node.parent) + [node.state]
+    states = []
+    while node not in (cutoff, failure, None):
+        states.append(node.state)
+        node = node.parent
+    states.reverse()
+    return states
 
 
 class MatrixPathProblem(Problem):
@@ -85,29 +116,46 @@ class MatrixPathProblem(Problem):
         self.start_char = start_char
         self.rows = len(matrix)
         self.cols = len(matrix[0])
+        self.codes = [[ord(ch) for ch in row] for row in matrix]
+        self.max_code = max(
+            (max(row, default=0) for row in self.codes), default=0
+        )
+        self.moves = self._build_moves()
         self.initial = self.find_start_positions()
         self.goal = None  # Целевое состояние не определено
 
     def find_start_positions(self):
         """Находим все позиции начального символа в матрице."""
-        positions = []
-        for r, c in product(range(self.rows), range(self.cols)):
-            if self.matrix[r][c] == self.start_char:
-                positions.append((r, c))
-        return positions
+        start_code = ord(self.start_char)
+        return [
+            (r, c)
+            for r, c in product(range(self.rows), range(self.cols))
+            if self.codes[r][c] == start_code
+        ]
+
+    def _build_moves(self):
+        """Заранее вычисляем допустимые действия для каждой клетки."""
+        moves = []
+        for r in range(self.rows):
+            row_moves = []
+            for c in range(self.cols):
+                next_code = self.codes[r][c] + 1
+                row_moves.append(
+                    tuple(
+                        (dr, dc)
+                        for dr, dc in DIRS8
+                        if 0 <= r + dr < self.rows
+                        and 0 <= c + dc < self.cols
+                        and self.codes[r + dr][c + dc] == next_code
+                    )
+                )
+            moves.append(row_moves)
+        return moves
 
     def actions(self, state):
         """Возвращаем список допустимых действий из состояния."""
         r, c = state
-        possible_actions = [
-            (dr, dc)
-            for dr, dc in product([-1, 0, 1], repeat=2)
-            if (dr != 0 or dc != 0)
-            and 0 <= r + dr < self.rows
-            and 0 <= c + dc < self.cols
-            and ord(self.matrix[r + dr][c + dc]) == ord(self.matrix[r][c]) + 1
-        ]
-        return possible_actions
+        return self.moves[r][c]
 
     def result(self, state, action):
         """Возвращаем новое состояние после применения действия."""
@@ -120,24 +168,81 @@ class MatrixPathProblem(Problem):
         return False
 
 
-def depth_first_search(problem):
-    """Поиск в глубину для нахождения самого длинного пути."""
-
-    def recursive_dfs(node, visited):
-        visited.add(node.state)
-        max_length = 0
-        for child in expand(problem, node):
-            if child.state not in visited:
-                length = recursive_dfs(child, visited)
-                max_length = max(max_length, length)
-        visited.remove(node.state)
-        return 1 + max_length
-
-    max_path_length = 0
-    for start_state in problem.initial:
-        node = Node(start_state)
-        max_path_length = max(max_path_length, recursive_dfs(node, set()))
-    return max_path_length
+def _longest_from(moves, codes, max_code, memo, r, c):
+    """Длина самого длинного пути из клетки (r, c).
+
+    Найденные длины запоминаются в словаре memo. Перебор соседей
+    прекращается, как только путь достигает верхней оценки: код символа
+    растёт на 1 за ход, поэтому из (r, c) не больше max_code - code + 1
+    клеток.
+    """
+    length = memo.get((r, c))
+    if length is not None:
+        return length
+
+    bound = max_code - codes[r][c]
+    best = 0
+    for dr, dc in moves[r][c]:
+        length = _longest_from(moves, codes, max_code, memo, r + dr, c + dc)
+        if length > best:
+            best = length
+            if best >= bound:
+                break
+    memo[(r, c)] = 1 + best
+    return 1 + best
+
+
+# Данные задачи и кэш длин в процессе пула
+_worker_args = None
+
+
+def _init_worker(moves, codes, max_code):
+    """Сохраняет данные задачи в процессе пула с пустым кэшем длин."""
+    global _worker_args
+    _worker_args = (moves, codes, max_code, {})
+
+
+def _longest_from_start(start):
+    return _longest_from(*_worker_args, *start)
+
+
+def depth_first_search(problem, processes=None):
+    """Поиск в глубину для нахождения самого длинного пути.
+
+    Каждый ход увеличивает код символа на единицу, поэтому граф ходов
+    ацикличен: длина самого длинного пути из клетки не зависит от того,
+    как в неё пришли. Её можно запомнить, и множество посещённых клеток
+    не требуется. Та же монотонность даёт верхнюю оценку длины пути,
+    по достижении которой поиск прекращается.
+
+    Поиски из разных стартовых клеток независимы, поэтому при большом
+    их числе они распределяются по пулу процессов. Каждый процесс
+    получает крупный блок стартов, чтобы кэш внутри него переиспользовался.
+    """
+    starts = problem.initial
+    if not starts:
+        return 0
+
+    data = (problem.moves, problem.codes, problem.max_code)
+    r, c = starts[0]
+    bound = problem.max_code - problem.codes[r][c] + 1
+    best = 0
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(starts) < PARALLEL_MIN_STARTS:
+        memo = {}
+        for r, c in starts:
+            best = max(best, _longest_from(*data, memo, r, c))
+            if best >= bound:
+                break
+        return best
+
+    chunksize = math.ceil(len(starts) / processes)
+    # Результаты дочитываются до конца: выход из пула с незавершёнными
+    # задачами вызывает terminate(), который может зависнуть
+    with Pool(processes, initializer=_init_worker, initargs=data) as pool:
+        lengths = pool.map(_longest_from_start, starts, chunksize)
+    return max(lengths)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+from collections import deque
+
 
 class FloodFillProblem:
     """
@@ -13,43 +15,88 @@ class FloodFillProblem:
         self.target_color = target_color
         self.replacement_color = replacement_color
 
+        # Кодируем цвета небольшими целыми числами, а строки матрицы
+        # храним как bytearray: проверка клетки сводится к сравнению чисел.
+        # Если цветов больше 256, коды не помещаются в байт, и строки
+        # хранятся обычными списками.
+        colors = {target_color, replacement_color}.union(*matrix)
+        self.codes = {color: i for i, color in enumerate(colors)}
+        self.row_type = bytearray if len(self.codes) <= 256 else list
+        self.grid = [
+            self.row_type(self.codes[color] for color in row) for row in matrix
+        ]
+        self.target_code = self.codes[target_color]
+        self.replacement_code = self.codes[replacement_color]
+
     def is_valid(self, x, y):
         """
         Проверяет, находится ли узел в пределах матрицы и имеет целевой цвет.
         """
-        rows, cols = len(self.matrix), len(self.matrix[0])
+        rows, cols = len(self.grid), len(self.grid[0])
         return (
             0 <= x < rows
             and 0 <= y < cols
-            and self.matrix[x][y] == self.target_color
+            and self.grid[x][y] == self.target_code
         )
 
+    def push_runs(self, seeds, x, left, right):
+        """
+        Добавляет в очередь по одной затравке на каждый отрезок целевого
+        цвета в строке x между столбцами left и right.
+        """
+        if not 0 <= x < len(self.grid):
+            return
+
+        row = self.grid[x]
+        target = self.target_code
+        in_run = False
+        for y in range(left, right + 1):
+            if row[y] == target:
+                if not in_run:
+                    seeds.append((x, y))
+                    in_run = True
+            else:
+                in_run = False
+
     def fill(self):
         """
-        Выполняет алгоритм заливки, начиная с начального узла.
+        Выполняет построчную заливку (scanline), начиная с начального узла.
         """
         start_x, start_y = self.start_node
 
         # Если начальный узел уже окрашен в цвет замены, ничего не делаем.
-        if self.matrix[start_x][start_y] == self.replacement_color:
+        if self.grid[start_x][start_y] == self.replacement_code:
             return self.matrix
 
-        def dfs(x, y):
-            """
-            Рекурсивная функция для выполнения заливки.
-            """
+        cols = len(self.grid[0])
+        target = self.target_code
+        seeds = deque([(start_x, start_y)])
+        while seeds:
+            x, y = seeds.popleft()
             if not self.is_valid(x, y):
-                return
-
-            # Заменяем цвет текущего узла
-            self.matrix[x][y] = self.replacement_color
-
-            # Рекурсивно обрабатываем соседей
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                dfs(x + dx, y + dy)
+                continue
+
+            # Расширяем отрезок целевого цвета влево и вправо
+            row = self.grid[x]
+            left = y
+            while left > 0 and row[left - 1] == target:
+                left -= 1
+            right = y
+            while right < cols - 1 and row[right + 1] == target:
+                right += 1
+
+            # Закрашиваем весь отрезок одной операцией в обоих
+            # представлениях матрицы
+            width = right - left + 1
+            row[left : right + 1] = (
+                self.row_type([self.replacement_code]) * width
+            )
+            self.matrix[x][left : right + 1] = [self.replacement_color] * width
+
+            # Ищем новые отрезки в соседних строках
+            self.push_runs(seeds, x - 1, left, right)
+            self.push_runs(seeds, x + 1, left, right)
 
-        # Запускаем заливку
-        dfs(start_x, start_y)
         return self.matrix
 
 
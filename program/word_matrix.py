@@ -4,6 +4,22 @@
 import math
 from itertools import product
 
+# Смещения к восьми соседним клеткам
+DIRS8 = (
+    (-1, -1),
+    (-1, 0),
+    (-1, 1),
+    (0, -1),
+    (0, 1),
+    (1, -1),
+    (1, 0),
+    (1, 1),
+)
+
+# Ключ узла префиксного дерева, под которым хранится законченное слово.
+# Это не строка, поэтому он не совпадает ни с одним символом матрицы.
+_END = object()
+
 
 class Problem:
     """Абстрактный класс для формальной задачи."""
@@ -35,16 +51,24 @@ class Problem:
 class Node:
     """Узел в дереве поиска."""
 
+    __slots__ = ("state", "parent", "action", "path_cost")
+
     def __init__(self, state, parent=None, action=None, path_cost=0):
-        self.__dict__.update(
-            state=state, parent=parent, action=action, path_cost=path_cost
-        )
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.path_cost = path_cost
 
     def __repr__(self):
         return "<{}>".format(self.state)
 
     def __len__(self):
-        return 0 if self.parent is None else (1 + len(self.parent))
+        depth = 0
+        node = self.parent
+        while node is not None:
+            depth += 1
+            node = node.parent
+        return depth
 
     def __lt__(self, other):
         return self.path_cost < other.path_cost
@@ -65,25 +89,43 @@ def expand(problem, node):
 
 def path_actions(node):
     """Последовательность действий, чтобы добраться до этого узла."""
-    if node.parent is None:
-        return []
-    return path_actions(node.parent) + [node.action]
+    actions = []
+    while node.parent is not None:
+        actions.append(node.action)
+        node = node.parent
+    actions.reverse()
+    return actions
 
 
 def path_states(node):
     """Последовательность состояний, чтобы добраться до этого узла."""
-    if node in (cutoff, failure, None):
-        return []
-    return path_states(node.parent) + [node.state]
+    states = []
+    while node not in (cutoff, failure, None):
+        states.append(node.state)
+        node = node.parent
+    states.reverse()
+    return states
+
 
+def is_valid_move(nx, ny, rows, cols, mask):
+    """Проверяет, находится ли (nx, ny) в матрице и посещена ли она.
 
-def is_valid_move(nx, ny, rows, cols, path):
-    """Проверяет, находится ли (nx, ny) в матрице и посещена ли она."""
-    return 0 <= nx < rows and 0 <= ny < cols and (nx, ny) not in path
+    Посещённые клетки заданы битовой маской: клетке (x, y) соответствует
+    бит с номером x * cols + y.
+    """
+    return (
+        0 <= nx < rows
+        and 0 <= ny < cols
+        and not (mask >> (nx * cols + ny)) & 1
+    )
 
 
 class MatrixWordSearchProblem(Problem):
-    """Задача поиска слов в матрице символов."""
+    """Задача поиска слов в матрице символов.
+
+    Состояние — кортеж (x, y, node, mask), где node — текущий узел
+    префиксного дерева, а mask — битовая маска посещённых клеток.
+    """
 
     def __init__(self, board, dictionary):
         super().__init__(initial=None)
@@ -91,68 +133,91 @@ class MatrixWordSearchProblem(Problem):
         self.dictionary = set(dictionary)
         self.rows = len(board)
         self.cols = len(board[0]) if self.rows > 0 else 0
-        self.prefixes = self._build_prefix_set(dictionary)
+        self.trie = self._build_trie(dictionary)
+        self.first_chars = {word[0] for word in self.dictionary if word}
+        self.starts_by_char = self._group_starts()
 
-    def _build_prefix_set(self, words):
-        """Создает множество всех префиксов из списка слов."""
-        prefixes = set()
+    def _build_trie(self, words):
+        """Создает префиксное дерево; ключ _END хранит найденное слово."""
+        trie = {}
         for word in words:
-            for i in range(len(word)):
-                prefixes.add(word[: i + 1])
-        return prefixes
+            node = trie
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node[_END] = word
+        return trie
+
+    def _group_starts(self):
+        """Группирует клетки матрицы по первым буквам слов словаря."""
+        starts_by_char = {}
+        for x, y in product(range(self.rows), range(self.cols)):
+            ch = self.board[x][y]
+            if ch in self.first_chars:
+                starts_by_char.setdefault(ch, []).append((x, y))
+        return starts_by_char
 
     def actions(self, state):
         """Возвращает список допустимых действий из текущего состояния."""
-        (x, y, path) = state
-        directions = [
-            (-1, -1),
-            (-1, 0),
-            (-1, 1),
-            (0, -1),
-            (0, 1),
-            (1, -1),
-            (1, 0),
-            (1, 1),
-        ]
-        for dx, dy in directions:
+        (x, y, node, mask) = state
+        for dx, dy in DIRS8:
             nx, ny = x + dx, y + dy
-            if is_valid_move(nx, ny, self.rows, self.cols, path):
+            if (
+                is_valid_move(nx, ny, self.rows, self.cols, mask)
+                and self.board[nx][ny] in node
+            ):
                 yield (nx, ny)
 
     def result(self, state, action):
         """Возвращает новое состояние после применения действия."""
-        (x, y, path) = state
+        (x, y, node, mask) = state
         (nx, ny) = action
-        new_path = path + [(nx, ny)]
-        return (nx, ny, new_path)
+        new_mask = mask | (1 << (nx * self.cols + ny))
+        return (nx, ny, node[self.board[nx][ny]], new_mask)
 
     def is_goal(self, state):
         """Проверяет, является ли текущее состояние целевым."""
-        (x, y, path) = state
-        word = "".join(self.board[i][j] for i, j in path)
-        return word in self.dictionary
+        (x, y, node, mask) = state
+        return _END in node
 
     def find_words_from(self, x, y):
-        """Ищет все слова, начинающиеся с позиции (x, y)."""
+        """Ищет все слова, начинающиеся с позиции (x, y).
+
+        Проверка цели совмещена с раскрытием: слово из ключа _END узла
+        дерева добавляется сразу при переходе в клетку, а в стек попадают
+        только узлы, у которых есть продолжения.
+        """
         found_words = set()
-        stack = [(x, y, [(x, y)])]
+        node = self.trie.get(self.board[x][y])
+        if node is None:
+            return found_words
+        if _END in node:
+            found_words.add(node[_END])
+
+        board, rows, cols = self.board, self.rows, self.cols
+        stack = [(x, y, node, 1 << (x * cols + y))]
         while stack:
-            state = stack.pop()
-            (cx, cy, path) = state
-            word = "".join(self.board[i][j] for i, j in path)
-            if word in self.dictionary:
-                found_words.add(word)
-            if word in self.prefixes:
-                for action in self.actions(state):
-                    new_state = self.result(state, action)
-                    stack.append(new_state)
+            (cx, cy, node, mask) = stack.pop()
+            for dx, dy in DIRS8:
+                nx, ny = cx + dx, cy + dy
+                if not is_valid_move(nx, ny, rows, cols, mask):
+                    continue
+                child = node.get(board[nx][ny])
+                if child is None:
+                    continue
+                word = child.get(_END)
+                if word is not None:
+                    found_words.add(word)
+                # Узел имеет продолжения, если в нём есть ключи кроме _END
+                if word is None or len(child) > 1:
+                    stack.append((nx, ny, child, mask | 1 << (nx * cols + ny)))
         return found_words
 
     def find_all_words(self):
         """Ищет все слова в матрице."""
         found_words = set()
-        for x, y in product(range(self.rows), range(self.cols)):
-            found_words.update(self.find_words_from(x, y))
+        for cells in self.starts_by_char.values():
+            for x, y in cells:
+                found_words.update(self.find_words_from(x, y))
         return found_words
 
 